@@ -0,0 +1,115 @@
+#!/bin/bash
+#
+# Compiles the snippets in $SYSTEM_CONF/shell.d into the one file that
+# loader.sh sources, so a new shell opens a single file.
+#
+# The compiled file starts with a manifest check: it returns 1, and
+# loader.sh recompiles, when any snippet, the shell.d directory or these
+# scripts are newer than it. A snippet may list commands or paths in a
+# "# requires:" header; it is compiled in only when at least one of them
+# exists, which moves that check from every shell start to compile time.
+# Missing paths stay in the manifest, so installing one triggers a rebuild.
+#
+# Each snippet that runs at startup is wrapped in its own __sc_eager_<name>
+# function, and <out>.map lists "line<TAB>snippet<TAB>snippet line" for
+# every inlined line, so the startup profiler can charge their time to the
+# snippets they came from.
+
+conf="${SYSTEM_CONF:-$HOME/.config/system_conf}"
+out="${1:-${SC_CACHE:-${XDG_CACHE_HOME:-$HOME/.cache}/yadm-bootstrap/shell-init.sh}}"
+
+header() {
+	local line
+	while IFS= read -r line; do
+		case "$line" in
+		"# $2:"*)
+			line="${line#"# $2:"}"
+			printf '%s\n' "${line#"${line%%[![:space:]]*}"}"
+			return 0
+			;;
+		'#'*) ;;
+		*) return 0 ;;
+		esac
+	done < "$1"
+}
+
+# requires SNIPPET: 0 when the snippet has no requirements or one of them exists
+requires() {
+	local req found=1
+	local -a absent=()
+	for req in $(header "$1" requires); do
+		case "$req" in
+		'~/'*) req="$HOME/${req#'~/'}" ;;
+		esac
+		case "$req" in
+		*/*)
+			[ -e "$req" ] && found=0 || absent+=("$req")
+			;;
+		*)
+			command -v "$req" > /dev/null 2>&1 && found=0
+			;;
+		esac
+	done
+	[ -n "$req" ] || return 0
+	[ "$found" -eq 0 ] || missing+=("${absent[@]}")
+	return "$found"
+}
+
+compile() {
+	local snippet cmd cmds fn
+	local -a manifest=("$conf/loader.sh" "$conf/compile.sh" "$conf/shell.d") missing=() body=()
+
+	for snippet in "$conf"/shell.d/*.sh; do
+		[ -r "$snippet" ] || continue
+		manifest+=("$snippet")
+		requires "$snippet" || continue
+		cmds="$(header "$snippet" provides)"
+		if [ -n "$cmds" ]; then
+			for cmd in $cmds; do
+				body+=("$cmd() { __sc_load $(printf '%q' "$snippet") $cmds; $cmd \"\$@\"; }")
+			done
+		else
+			fn="__sc_eager_$(basename "$snippet" .sh)"
+			fn="${fn//[^A-Za-z0-9_]/_}"
+			body+=("$fn() {" "# __sc_snippet $snippet" "$(< "$snippet")" "# __sc_end" "}" "$fn" "unset -f $fn")
+		fi
+	done
+
+	printf '# Generated by %s; do not edit.\n' "$conf/compile.sh"
+	printf 'for __sc_f in'
+	printf ' %q' "${manifest[@]}"
+	printf '; do\n\t[ "$__sc_f" -nt "${BASH_SOURCE[0]}" ] && return 1\ndone\n'
+	if [ "${#missing[@]}" -gt 0 ]; then
+		printf 'for __sc_f in'
+		printf ' %q' "${missing[@]}"
+		printf '; do\n\t[ -e "$__sc_f" ] && return 1\ndone\n'
+	fi
+	cat <<'LOAD'
+unset __sc_f
+
+__sc_load() {
+	local snippet=$1
+	shift
+	unset -f "$@"
+	. "$snippet"
+}
+
+LOAD
+	[ "${#body[@]}" -eq 0 ] || printf '%s\n' "${body[@]}"
+	printf 'return 0\n'
+}
+
+# map COMPILED: the snippet and line each inlined line of COMPILED came from
+map() {
+	awk '
+		/^# __sc_snippet / { f = substr($0, 16); s = NR; next }
+		/^# __sc_end$/ { f = ""; next }
+		f != "" { printf "%d\t%s\t%d\n", NR, f, NR - s }
+	' "$1"
+}
+
+mkdir -p "${out%/*}" || exit 1
+compile > "$out.tmp.$$" && map "$out.tmp.$$" > "$out.map" && mv -f "$out.tmp.$$" "$out" || {
+	rm -f "$out.tmp.$$"
+	exit 1
+}
@@ -0,0 +1,21 @@
+# Loads the shell snippets in $SYSTEM_CONF/shell.d into interactive shells.
+#
+# A snippet that declares the commands it sets up in a "# provides: cmd..."
+# header is not sourced at startup. Each of those commands gets a stub
+# function instead; the first call to any of them removes the stubs, sources
+# the snippet and runs the real command. Snippets without the header run
+# right away.
+#
+# The snippets are not read here: compile.sh turns them into one cached
+# file, which is rebuilt when it reports itself stale.
+
+case $- in
+*i*) ;;
+*) return 0 ;;
+esac
+
+: "${SC_CACHE:=${XDG_CACHE_HOME:-$HOME/.cache}/yadm-bootstrap/shell-init.sh}"
+
+if ! { [ -r "$SC_CACHE" ] && . "$SC_CACHE"; }; then
+	bash "$SYSTEM_CONF/compile.sh" "$SC_CACHE" && . "$SC_CACHE"
+fi
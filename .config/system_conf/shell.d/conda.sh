@@ -0,0 +1,11 @@
+# Conda, initialized on first use.
+# provides: conda
+# requires: conda ~/miniconda3/bin/conda ~/miniforge3/bin/conda ~/anaconda3/bin/conda
+
+for __conda_root in "${CONDA_ROOT:-}" "$HOME/miniconda3" "$HOME/miniforge3" "$HOME/anaconda3"; do
+	if [ -n "$__conda_root" ] && [ -x "$__conda_root/bin/conda" ]; then
+		eval "$("$__conda_root/bin/conda" shell.bash hook)"
+		break
+	fi
+done
+unset __conda_root
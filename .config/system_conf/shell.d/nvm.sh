@@ -0,0 +1,9 @@
+# nvm and the node it selects, initialized on first use.
+# provides: nvm node npm npx
+# requires: ~/.nvm/nvm.sh
+
+export NVM_DIR="${NVM_DIR:-$HOME/.nvm}"
+if [ -s "$NVM_DIR/nvm.sh" ]; then
+	. "$NVM_DIR/nvm.sh"
+	[ -s "$NVM_DIR/bash_completion" ] && . "$NVM_DIR/bash_completion"
+fi
@@ -0,0 +1,12 @@
+# pyenv and its shims, initialized on first use.
+# provides: pyenv python python3 pip pip3
+# requires: ~/.pyenv/bin/pyenv
+
+export PYENV_ROOT="${PYENV_ROOT:-$HOME/.pyenv}"
+if [ -x "$PYENV_ROOT/bin/pyenv" ]; then
+	case ":$PATH:" in
+	*":$PYENV_ROOT/bin:"*) ;;
+	*) PATH="$PYENV_ROOT/bin:$PATH" ;;
+	esac
+	eval "$(pyenv init -)"
+fi
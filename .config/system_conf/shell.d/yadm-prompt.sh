@@ -0,0 +1,59 @@
+# Dotfiles drift indicator for the prompt, in $YADM_PROMPT.
+# requires: git
+#
+# YADM_PROMPT holds "*" when the yadm repo or one of its submodules has
+# uncommitted changes and "^" when either has commits no remote has, e.g.
+#   PS1='\u@\h \w${YADM_PROMPT:+ [$YADM_PROMPT]}\$ '
+# A prompt only reads the cached result, without forking. The cache is
+# recomputed in the background when the index, HEAD or FETCH_HEAD of the
+# yadm repo is newer than it or it is older than YADM_PROMPT_TTL seconds,
+# and the new result shows from the next prompt on.
+
+: "${YADM_PROMPT_TTL:=60}"
+__yadm_prompt_cache="${XDG_CACHE_HOME:-$HOME/.cache}/yadm-bootstrap/prompt"
+
+# __yadm_prompt_refresh CACHE: compute the indicator into CACHE
+__yadm_prompt_refresh() {
+	local mode sha path state="" now
+	trap 'rm -f "$1.lock" "$1.$BASHPID"' EXIT
+	[ -z "$(git --git-dir="$YADM_REPO" --work-tree="$HOME" status --porcelain \
+		--untracked-files=no --ignore-submodules=untracked 2> /dev/null)" ] || state="*"
+	if [ -n "$(git --git-dir="$YADM_REPO" rev-list -n 1 HEAD --not --remotes 2> /dev/null)" ]; then
+		state="$state^"
+	else
+		while read -r mode sha _ path; do
+			[ "$mode" = 160000 ] && [ -e "$HOME/$path/.git" ] || continue
+			[ -n "$(git -C "$HOME/$path" rev-list -n 1 HEAD --not --remotes 2> /dev/null)" ] || continue
+			state="$state^"
+			break
+		done < <(git --git-dir="$YADM_REPO" ls-files -s 2> /dev/null)
+	fi
+	printf -v now '%(%s)T' -1
+	mkdir -p "${1%/*}" &&
+		printf '%s %s\n' "$now" "$state" > "$1.$BASHPID" &&
+		mv -f "$1.$BASHPID" "$1"
+}
+
+__yadm_prompt() {
+	local cache=$__yadm_prompt_cache stamp state now
+	[ -d "$YADM_REPO" ] || return 0
+	printf -v now '%(%s)T' -1
+	if [ -r "$cache" ] && read -r stamp state < "$cache"; then
+		YADM_PROMPT=$state
+		[ "$YADM_REPO/index" -nt "$cache" ] || [ "$YADM_REPO/HEAD" -nt "$cache" ] ||
+			[ "$YADM_REPO/FETCH_HEAD" -nt "$cache" ] || [ $((now - stamp)) -ge "$YADM_PROMPT_TTL" ] ||
+			return 0
+	fi
+	# one refresh at a time; a lock older than a few TTLs was left by a killed one
+	if [ -r "$cache.lock" ] && read -r stamp < "$cache.lock"; then
+		[ $((now - stamp)) -ge $((YADM_PROMPT_TTL * 5)) ] || return 0
+	fi
+	[ -d "${cache%/*}" ] && printf '%s\n' "$now" > "$cache.lock"
+	# the inner & runs in a subshell, so job control never reports it
+	(__yadm_prompt_refresh "$cache" < /dev/null > /dev/null 2>&1 &)
+}
+
+case ";$PROMPT_COMMAND;" in
+*";__yadm_prompt;"*) ;;
+*) PROMPT_COMMAND="__yadm_prompt${PROMPT_COMMAND:+;$PROMPT_COMMAND}" ;;
+esac
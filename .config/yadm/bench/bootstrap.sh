@@ -0,0 +1,118 @@
+#!/bin/bash
+#
+# End-to-end bootstrap benchmark in throwaway home directories.
+#
+# Mirrors the dotfiles repo and every submodule it has checked out into
+# local bare repos, points their URLs at those mirrors with insteadOf, and
+# then, N times over, runs `yadm clone` followed by a cold and a warm
+# bootstrap in a fresh $HOME. Nothing touches the network or the real home
+# directory. Prints the median and p95 of each phase and of each step.
+# Scheduling is off in those homes (BOOTSTRAP_NO_SCHEDULE), since the
+# crontab and the systemd user manager are the real user's.
+
+. "$(dirname "${BASH_SOURCE[0]}")/common.sh"
+
+usage() {
+	cat <<USAGE
+usage: bench/bootstrap.sh [-n RUNS] [--source GITDIR] [--local] [-o DIR]
+
+  -n RUNS          iterations (default 5)
+  --source GITDIR  dotfiles repo to mirror (default \$YADM_REPO)
+  --local          run the bootstrap from $BOOTSTRAP_DIR instead of the cloned one
+  -o DIR           keep raw timings and run reports in DIR
+USAGE
+}
+
+runs=5
+source_repo="$YADM_REPO"
+local_bootstrap=""
+keep=""
+while [ $# -gt 0 ]; do
+	case "$1" in
+	-n)
+		runs="$2"
+		shift 2 || die "$1 needs a value"
+		;;
+	--source)
+		source_repo="$2"
+		shift 2 || die "$1 needs a value"
+		;;
+	--local)
+		local_bootstrap=1
+		shift
+		;;
+	-o)
+		keep="$2"
+		shift 2 || die "$1 needs a value"
+		;;
+	-h|--help)
+		usage
+		exit 0
+		;;
+	*)
+		usage >&2
+		exit 2
+		;;
+	esac
+done
+
+command -v yadm > /dev/null || die "yadm is not installed"
+git --git-dir="$source_repo" rev-parse -q --verify HEAD > /dev/null || die "$source_repo is not a git repository"
+
+work="$(mktemp -d "${TMPDIR:-/tmp}/bootstrap-bench.XXXXXX")" || exit 1
+trap 'rm -rf "$work"' EXIT
+mkdir -p "$work/remotes"
+export GIT_CONFIG_GLOBAL="$work/gitconfig" GIT_CONFIG_NOSYSTEM=1
+git config --global protocol.file.allow always
+git config --global user.name bench
+git config --global user.email bench@localhost
+
+# mirror GITDIR NAME: bare mirror of GITDIR and of the submodules it has checked out
+mirror() {
+	local gitdir=$1 name=$2 key path url
+	git clone -q --mirror "$gitdir" "$work/remotes/$name.git" || die "could not mirror $gitdir"
+	# not a pipeline, so die stops the benchmark rather than a subshell
+	while read -r key url; do
+		path="${key#submodule.}"
+		path="${path%.url}"
+		[ -d "$gitdir/modules/$path" ] || die "submodule $path is not checked out in $gitdir; bootstrap it first"
+		git config --global --add "url.file://$work/remotes/$name/$path.git.insteadOf" "$url"
+		mkdir -p "$work/remotes/$name/${path%/*}"
+		mirror "$gitdir/modules/$path" "$name/$path"
+	done < <(git --git-dir="$gitdir" config --blob HEAD:.gitmodules --get-regexp '^submodule\..*\.url$' 2>/dev/null)
+}
+mirror "$source_repo" dotfiles
+
+# run_bootstrap PHASE: one bootstrap run in the current HOME, timed as PHASE
+run_bootstrap() {
+	local script="$HOME/.config/yadm/bootstrap" report
+	[ -n "$local_bootstrap" ] && script="$BOOTSTRAP_DIR/bootstrap"
+	bench_time "$1" "$work/times" bash "$script" > "$work/log" 2>&1 || {
+		cat "$work/log" >&2
+		return 1
+	}
+	report="$(ls -1t "$HOME/.cache/yadm-bootstrap/history/"*.json | head -n 1)"
+	bench_steps "$report" "$1" "$work/times"
+	[ -z "$keep" ] || cp "$report" "$keep/$i-$1.json"
+}
+
+[ -z "$keep" ] || mkdir -p "$keep" || exit 1
+for i in $(seq "$runs"); do
+	(
+		export HOME="$work/home.$i"
+		unset XDG_CONFIG_HOME XDG_DATA_HOME XDG_CACHE_HOME YADM_REPO SYSTEM_CONF
+		unset BOOTSTRAP_CACHE BOOTSTRAP_OBJECTS BOOTSTRAP_ENV_FILE
+		export BOOTSTRAP_NO_SCHEDULE=1
+		mkdir -p "$HOME" && cd "$HOME" || exit 1
+		bench_time clone "$work/times" yadm clone --no-bootstrap "file://$work/remotes/dotfiles.git" > "$work/log" 2>&1 || {
+			cat "$work/log" >&2
+			exit 1
+		}
+		run_bootstrap cold && run_bootstrap warm
+	) || die "run $i failed"
+	rm -rf "$work/home.$i"
+	printf 'run %d/%d done\n' "$i" "$runs" >&2
+done
+
+[ -z "$keep" ] || cp "$work/times" "$keep/times"
+bench_stats "$work/times"
@@ -0,0 +1,42 @@
+# Helpers shared by the benchmarks in this directory.
+
+BENCH_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+BOOTSTRAP_DIR="${BENCH_DIR%/*}"
+
+. "$BOOTSTRAP_DIR/lib/common.sh"
+. "$BOOTSTRAP_DIR/lib/telemetry.sh"
+
+# bench_time NAME OUT CMD...: run CMD, append "NAME seconds" to OUT
+bench_time() {
+	local name=$1 out=$2 start rc
+	shift 2
+	start="$(now_us)"
+	"$@"
+	rc=$?
+	printf '%s %s\n' "$name" "$(telemetry_seconds $(($(now_us) - start)))" >> "$out"
+	return "$rc"
+}
+
+# bench_stats FILE: count, median, p95, min and max per name in a file of "name seconds" lines
+bench_stats() {
+	local name
+	printf '%-32s %5s %10s %10s %10s %10s\n' phase runs median p95 min max
+	awk '{ print $1 }' "$1" | awk '!seen[$0]++' | while IFS= read -r name; do
+		awk -v n="$name" '$1 == n { print $2 }' "$1" | sort -n | awk -v n="$name" '
+			{ v[NR] = $1 }
+			END {
+				if (!NR) exit
+				mid = int((NR + 1) / 2)
+				med = NR % 2 ? v[mid] : (v[mid] + v[mid + 1]) / 2
+				p = int(NR * 0.95 + 0.999999)
+				printf "%-32s %5d %10.4f %10.4f %10.4f %10.4f\n", n, NR, med, v[p], v[1], v[NR]
+			}'
+	done
+}
+
+# bench_steps REPORT PREFIX OUT: append "PREFIX:step seconds" for each step of a run report
+bench_steps() {
+	sed -n 's/^{"name": "\([^"]*\)".*"wall_s": \([0-9.]*\).*/\1 \2/p' "$1" | while read -r step secs; do
+		printf '%s:%s %s\n' "$2" "$step" "$secs"
+	done >> "$3"
+}
@@ -0,0 +1,96 @@
+#!/bin/bash
+#
+# Interactive shell startup latency gate.
+#
+# Times `bash -i -c exit` over many runs and compares the median with the
+# stored baseline. When it is more than THRESHOLD percent slower, profiles
+# one startup and prints which sourced files got slower since the baseline
+# was taken, then exits 1. Every measurement is appended to a history file.
+# The first run, or --update, stores the current numbers as the baseline.
+
+. "$(dirname "${BASH_SOURCE[0]}")/common.sh"
+. "$BOOTSTRAP_DIR/lib/state.sh"
+. "$BOOTSTRAP_DIR/lib/startup.sh"
+
+usage() {
+	cat <<USAGE
+usage: bench/shell-startup.sh [-n RUNS] [-t THRESHOLD] [--update]
+
+  -n RUNS          shells to start (default 50)
+  -t THRESHOLD     allowed slowdown of the median in percent (default 10)
+  --update         store this measurement as the new baseline
+USAGE
+}
+
+runs=50
+threshold=10
+update=""
+while [ $# -gt 0 ]; do
+	case "$1" in
+	-n)
+		runs="$2"
+		shift 2 || die "$1 needs a value"
+		;;
+	-t)
+		threshold="$2"
+		shift 2 || die "$1 needs a value"
+		;;
+	--update)
+		update=1
+		shift
+		;;
+	-h|--help)
+		usage
+		exit 0
+		;;
+	*)
+		usage >&2
+		exit 2
+		;;
+	esac
+done
+
+dir="$BOOTSTRAP_CACHE/startup"
+mkdir -p "$dir" || exit 1
+work="$(mktemp -d "${TMPDIR:-/tmp}/shell-startup.XXXXXX")" || exit 1
+trap 'rm -rf "$work"' EXIT
+
+bash -i -c exit < /dev/null > /dev/null 2>&1
+for _ in $(seq "$runs"); do
+	bench_time startup "$work/times" bash -i -c exit < /dev/null > /dev/null 2>&1
+done
+read -r _ _ median p95 _ < <(bench_stats "$work/times" | awk '$1 == "startup" { $2 = $2; print }')
+median_ms="$(awk -v s="$median" 'BEGIN { printf "%.1f", s * 1000 }')"
+p95_ms="$(awk -v s="$p95" 'BEGIN { printf "%.1f", s * 1000 }')"
+printf '%s %s %s %s\n' "$(date -u +%FT%TZ)" "$runs" "$median_ms" "$p95_ms" >> "$dir/history"
+printf 'startup: median %s ms, p95 %s ms over %d shells\n' "$median_ms" "$p95_ms" "$runs"
+
+startup_trace "$work/trace" || die "could not trace the shell startup"
+startup_costs "$work/trace" | awk -F '\t' '$1 == "F" { print $2 "\t" $3 }' > "$work/files"
+
+if [ -n "$update" ] || [ ! -f "$dir/baseline" ]; then
+	printf '%s %s\n' "$median_ms" "$p95_ms" > "$dir/baseline"
+	cp "$work/files" "$dir/baseline.files"
+	log "stored as the baseline"
+	exit 0
+fi
+
+read -r base_ms _ < "$dir/baseline"
+if awk -v now="$median_ms" -v base="$base_ms" -v t="$threshold" 'BEGIN { exit !(now <= base * (1 + t / 100)) }'; then
+	printf 'within %s%% of the baseline median (%s ms)\n' "$threshold" "$base_ms"
+	exit 0
+fi
+
+awk -v now="$median_ms" -v base="$base_ms" -v t="$threshold" 'BEGIN {
+	printf "startup regressed: median %.1f ms vs baseline %.1f ms (%+.1f%%, threshold %s%%)\n", now, base, (now / base - 1) * 100, t
+}'
+printf '\n%10s %10s %10s  %s\n' "base ms" "now ms" "delta" "file"
+awk -F '\t' '
+	FNR == NR { base[$2] = $1; next }
+	{ now[$2] = $1 }
+	END {
+		for (f in base) if (!(f in now)) now[f] = 0
+		for (f in now) printf "%.1f\t%10.1f %10.1f %+10.1f  %s\n", now[f] - base[f], base[f], now[f], now[f] - base[f], f
+	}
+' "$dir/baseline.files" "$work/files" | sort -rn | cut -f 2- | head -n 15
+exit 1
@@ -0,0 +1,118 @@
+#!/bin/bash
+#
+# `yadm status` on a large synthetic home, before and after repo tuning.
+#
+# Builds a throwaway home of FILES untracked files (caches, venvs, build
+# trees) around a few hundred tracked dotfiles, in a repo laid out the way
+# yadm lays out its own: worktree $HOME, git dir elsewhere. Times `status`
+# and `status -uall` (what prompt integrations often run) with git's
+# defaults, then applies lib/repo.sh and times them again, along with an
+# explicit `status -unormal`.
+
+. "$(dirname "${BASH_SOURCE[0]}")/common.sh"
+. "$BOOTSTRAP_DIR/lib/repo.sh"
+
+usage() {
+	cat <<USAGE
+usage: bench/yadm-status.sh [-n RUNS] [--files FILES] [-o DIR]
+
+  -n RUNS          timed runs per phase (default 5)
+  --files FILES    untracked files in the synthetic home (default 1000000)
+  -o DIR           keep the raw timings in DIR
+USAGE
+}
+
+runs=5
+files=1000000
+keep=""
+while [ $# -gt 0 ]; do
+	case "$1" in
+	-n)
+		runs="$2"
+		shift 2 || die "$1 needs a value"
+		;;
+	--files)
+		files="$2"
+		shift 2 || die "$1 needs a value"
+		;;
+	-o)
+		keep="$2"
+		shift 2 || die "$1 needs a value"
+		;;
+	-h|--help)
+		usage
+		exit 0
+		;;
+	*)
+		usage >&2
+		exit 2
+		;;
+	esac
+done
+
+work="$(mktemp -d "${TMPDIR:-/tmp}/yadm-status-bench.XXXXXX")" || exit 1
+home="$work/home"
+repo="$work/repo.git"
+cleanup() {
+	git --git-dir="$repo" --work-tree="$home" fsmonitor--daemon stop > /dev/null 2>&1
+	! command -v watchman > /dev/null || watchman watch-del "$home" > /dev/null 2>&1
+	rm -rf "$work"
+}
+trap cleanup EXIT
+export GIT_CONFIG_GLOBAL="$work/gitconfig" GIT_CONFIG_NOSYSTEM=1
+git config --global user.name bench
+git config --global user.email bench@localhost
+
+# 1000 files per directory, spread over the kinds of trees a home collects
+log "creating $files files in $home"
+dir=0
+left="$files"
+while [ "$left" -gt 0 ]; do
+	case $((dir % 4)) in
+	0) d="$home/.cache/pip/http/$((dir / 100))/$dir" ;;
+	1) d="$home/.local/share/venvs/env$((dir / 100))/lib/site-packages/pkg$dir" ;;
+	2) d="$home/src/project$((dir / 100))/node_modules/mod$dir" ;;
+	3) d="$home/src/project$((dir / 100))/build/obj$dir" ;;
+	esac
+	n=$((left < 1000 ? left : 1000))
+	mkdir -p "$d" && (cd "$d" && touch $(seq -f 'f%g' "$n")) || exit 1
+	left=$((left - n))
+	dir=$((dir + 1))
+done
+for app in $(seq -f 'app%g' 60); do
+	mkdir -p "$home/.config/$app"
+	for f in config keys theme colors local; do
+		echo "$app $f" > "$home/.config/$app/$f"
+	done
+done
+echo 'export EDITOR=vim' > "$home/.bashrc"
+for d in .cache/pip .local/share/venvs src; do
+	echo "# $d" > "$home/$d/.keep"
+done
+
+git init -q --bare "$repo" &&
+	git --git-dir="$repo" config core.bare false &&
+	git --git-dir="$repo" config core.worktree "$home" &&
+	git --git-dir="$repo" add .bashrc .config .cache/pip/.keep .local/share/venvs/.keep src/.keep &&
+	git --git-dir="$repo" commit -q -m dotfiles || die "could not create the repo"
+
+# phase NAME ARGS...: warm up once, then time RUNS runs of git status ARGS
+phase() {
+	local name=$1 i
+	shift
+	git --git-dir="$repo" status "$@" > /dev/null
+	for i in $(seq "$runs"); do
+		bench_time "$name" "$work/times" git --git-dir="$repo" status "$@" > /dev/null
+	done
+}
+
+phase before:status
+phase before:status-all -uall
+repo_tune "$repo" "$home" || die "could not tune the repo"
+log "core.fsmonitor: $(git --git-dir="$repo" config core.fsmonitor || echo none)"
+phase after:status
+phase after:status-untracked -unormal
+phase after:status-all -uall
+
+[ -z "$keep" ] || { mkdir -p "$keep" && cp "$work/times" "$keep/times"; }
+bench_stats "$work/times"
@@ -0,0 +1,6 @@
+# Keep the managed block of .bashrc current.
+# inputs: .bashrc .config/yadm/lib/env.sh .config/yadm/lib/bashrc.sh
+
+log "Init custom environment variables"
+
+bashrc_update
@@ -0,0 +1,12 @@
+# Map Hangul, CJK and box-drawing ranges to the font_family fallback that covers them.
+# after: fonts
+# inputs: .config/system_conf/font.conf .config/yadm/lib/fonts.sh @fonts
+
+log "Map symbol ranges to fonts"
+
+if ! command -v fc-list > /dev/null; then
+	log "fontconfig is not installed, skipping"
+	return 0
+fi
+font_map_write
+sed -n 's/^symbol_map //p' "$SYSTEM_CONF/font-symbols.conf"
@@ -0,0 +1,18 @@
+# Install the fonts font.conf names from the font cache and warm up fontconfig.
+# inputs: .config/system_conf/font.conf .config/yadm/lib/fonts.sh @fontcache @fonts
+
+log "Check fonts"
+
+if ! command -v fc-list > /dev/null; then
+	log "fontconfig is not installed, skipping"
+	return 0
+fi
+mapfile -t missing < <(font_missing)
+for name in "${missing[@]}"; do
+	if font_install "$name"; then
+		log "installed $name from the font cache"
+	else
+		warn "$name is not installed; add it with 'bootstrap font-add FILE...'"
+	fi
+done
+font_cache_update
@@ -0,0 +1,6 @@
+# Schedule daily maintenance of the yadm repo, its submodules and the object cache.
+# inputs: .config/systemd/user/yadm-maintenance.service .config/systemd/user/yadm-maintenance.timer .config/yadm/lib/maintenance.sh
+
+log "Schedule repo maintenance"
+
+maintenance_register
@@ -0,0 +1,6 @@
+# Configure the yadm repo so `yadm status` stays fast on a $HOME worktree.
+# inputs: .config/yadm/lib/repo.sh
+
+log "Tune the yadm repo"
+
+repo_tune "$YADM_REPO" "$HOME"
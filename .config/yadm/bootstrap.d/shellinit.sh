@@ -0,0 +1,6 @@
+# Compile the SYSTEM_CONF shell snippets into the cached init file.
+# inputs: .config/system_conf/shell.d .config/system_conf/loader.sh .config/system_conf/compile.sh
+
+log "Compile shell init"
+
+traced "compile.sh" bash "$SYSTEM_CONF/compile.sh"
@@ -0,0 +1,12 @@
+# Check out the submodules of the yadm repo that are not at their recorded commit.
+# inputs: .gitmodules @gitlinks @checkouts @profile
+
+log "Init submodules"
+
+mapfile -t stale < <(submodule_stale)
+if [ "${#stale[@]}" -eq 0 ]; then
+	log "all submodules up to date"
+else
+	[ -z "$BOOTSTRAP_RESUMING" ] || submodule_salvage "${stale[@]}"
+	submodule_update "${stale[@]}"
+fi
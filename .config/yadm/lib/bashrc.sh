@@ -0,0 +1,63 @@
+# The managed block in .bashrc.
+#
+# Everything the bootstrap needs in .bashrc lives between BASHRC_BEGIN and
+# BASHRC_END. The block is rendered in memory and the file is only replaced,
+# through a temp file and a rename, when the result differs from what is on
+# disk. Lines that older bootstraps appended outside the block are dropped.
+
+BASHRC_BEGIN='# >>> yadm bootstrap >>>'
+BASHRC_END='# <<< yadm bootstrap <<<'
+
+bashrc_block() {
+	local env="$BOOTSTRAP_ENV_FILE"
+	case "$env" in
+	"$HOME"/*) env="\$HOME/${env#"$HOME"/}" ;;
+	esac
+	printf '%s\n' "$BASHRC_BEGIN" '# Managed by ~/.config/yadm/bootstrap; edits inside this block are overwritten.' \
+		"[ -r \"$env\" ] && . \"$env\"" \
+		'[ -r "$SYSTEM_CONF/loader.sh" ] && . "$SYSTEM_CONF/loader.sh"' "$BASHRC_END"
+}
+
+bashrc_legacy() {
+	case "$1" in
+	'export SYSTEM_CONF=$HOME/.config/system_conf') return 0 ;;
+	'[ -r "$HOME/.config/yadm/env" ] && . "$HOME/.config/yadm/env"') return 0 ;;
+	esac
+	return 1
+}
+
+# bashrc_update [FILE]: install or refresh the managed block, 1 when the file could not be written
+bashrc_update() {
+	local file="${1:-$HOME/.bashrc}" line inside=0 placed=0
+	local -a old=() new=() block=()
+
+	file="$(readlink -f "$file" 2>/dev/null || printf '%s' "$file")"
+	[ -f "$file" ] && mapfile -t old < "$file"
+	mapfile -t block < <(bashrc_block)
+
+	for line in "${old[@]}"; do
+		if [ "$inside" -eq 1 ]; then
+			[ "$line" = "$BASHRC_END" ] && inside=0
+			continue
+		fi
+		if [ "$line" = "$BASHRC_BEGIN" ]; then
+			inside=1
+			[ "$placed" -eq 1 ] && continue
+			new+=("${block[@]}")
+			placed=1
+			continue
+		fi
+		bashrc_legacy "$line" || new+=("$line")
+	done
+	[ "$placed" -eq 1 ] || new=("${block[@]}" "${new[@]}")
+
+	[ "${#new[@]}" -eq "${#old[@]}" ] && [ "$(printf '%s\n' "${new[@]}")" = "$(printf '%s\n' "${old[@]}")" ] && return 0
+
+	printf '%s\n' "${new[@]}" > "$file.tmp.$$" &&
+		{ [ ! -f "$file" ] || chmod "$(stat -c %a "$file" 2>/dev/null || stat -f %Lp "$file")" "$file.tmp.$$"; } &&
+		mv -f "$file.tmp.$$" "$file" || {
+		rm -f "$file.tmp.$$"
+		return 1
+	}
+	log "updated the managed block in $file"
+}
@@ -0,0 +1,56 @@
+# Offline provisioning from git bundles.
+#
+# `bootstrap bundle DIR` writes the yadm repo and every submodule checked out
+# under it (nested ones included) as bundles into DIR, plus a manifest of
+# "<bundle>\t<url>" lines; the first line is the yadm repo itself. A new
+# host can then run
+#
+#   yadm clone --no-bootstrap DIR/dotfiles.bundle
+#   ~/.config/yadm/bootstrap --bundles DIR
+#
+# bundle_use rewrites each manifest URL to its bundle through insteadOf,
+# passed in GIT_CONFIG_* so that every git the steps start, including the
+# object cache fetches, reads from the bundles instead of the network.
+
+bundle_create() {
+	local out=$1 gitdir url file
+	[ -n "$out" ] || die "usage: bootstrap bundle DIR"
+	mkdir -p "$out" || return 1
+	out="$(cd "$out" && pwd)"
+
+	url="$(ygit config remote.origin.url)"
+	git --git-dir="$YADM_REPO" bundle create -q "$out/dotfiles.bundle" --all || return 1
+	printf 'dotfiles.bundle\t%s\n' "${url:--}" > "$out/manifest.tmp"
+
+	[ ! -d "$YADM_REPO/modules" ] || find "$YADM_REPO/modules" -name config -type f | while IFS= read -r gitdir; do
+		gitdir="${gitdir%/config}"
+		[ -d "$gitdir/objects" ] || continue
+		url="$(git --git-dir="$gitdir" config remote.origin.url)" || continue
+		file="$(printf '%s' "$url" | git hash-object --stdin).bundle"
+		log "bundling ${gitdir#"$YADM_REPO/modules/"}"
+		git --git-dir="$gitdir" bundle create -q "$out/$file" --all || exit 1
+		printf '%s\t%s\n' "$file" "$url" >> "$out/manifest.tmp"
+	done || return 1
+	mv -f "$out/manifest.tmp" "$out/manifest"
+	log "wrote $(($(wc -l < "$out/manifest"))) bundles to $out"
+}
+
+# bundle_use DIR: serve every URL in DIR/manifest from its bundle
+bundle_use() {
+	local dir file url n=0 origin
+	dir="$(cd "$1" 2>/dev/null && pwd)" && [ -f "$dir/manifest" ] || die "no bundle manifest in $1"
+
+	export GIT_CONFIG_KEY_0=protocol.file.allow GIT_CONFIG_VALUE_0=always
+	while IFS=$'\t' read -r file url; do
+		[ "$url" != - ] || continue
+		n=$((n + 1))
+		export "GIT_CONFIG_KEY_$n=url.$dir/$file.insteadOf" "GIT_CONFIG_VALUE_$n=$url"
+	done < "$dir/manifest"
+	export GIT_CONFIG_COUNT=$((n + 1))
+
+	origin="$(ygit config remote.origin.url)"
+	read -r file url < "$dir/manifest"
+	if [ "$origin" = "$dir/dotfiles.bundle" ] && [ "$url" != - ]; then
+		ygit remote set-url origin "$url"
+	fi
+}
@@ -0,0 +1,76 @@
+# Map the paths changed between two commits to the steps that depend on them.
+#
+# A changed path selects every step whose "# inputs:" names it or a
+# directory above it, a changed gitlink or .gitmodules selects the steps
+# with @gitlinks or @checkouts, any change selects the @head steps, and a
+# changed step file selects that step. A change to the bootstrap itself, its
+# libraries or the profiles selects everything. Steps that run after a
+# selected step are selected as well.
+
+# changes_steps REV: the steps affected by the commits from REV to HEAD
+changes_steps() {
+	local name input path all="" grown
+	local -a paths=() gitlinks=()
+	local -A selected=()
+
+	ygit rev-parse -q --verify "$1^{commit}" > /dev/null || return 1
+	mapfile -t paths < <(ygit diff --name-only "$1" HEAD --)
+	[ "${#paths[@]}" -gt 0 ] || return 0
+	mapfile -t gitlinks < <(ygit diff --raw "$1" HEAD -- | awk '$1 == ":160000" || $2 == "160000" { print $NF }')
+
+	for path in "${paths[@]}"; do
+		case "$path" in
+		.config/yadm/bootstrap|.config/yadm/lib/*|.config/yadm/profiles/*) all=1 ;;
+		.config/yadm/bootstrap.d/*.sh)
+			name="${path##*/}"
+			selected[${name%.sh}]=1
+			;;
+		esac
+	done
+
+	for name in "${STEP_ORDER[@]}"; do
+		[ -z "$all" ] || {
+			selected[$name]=1
+			continue
+		}
+		for input in $(step_header "${STEP_FILE[$name]}" inputs); do
+			case "$input" in
+			@head)
+				selected[$name]=1
+				;;
+			@gitlinks|@checkouts)
+				[ "${#gitlinks[@]}" -eq 0 ] || selected[$name]=1
+				for path in "${paths[@]}"; do
+					[ "$path" != .gitmodules ] || selected[$name]=1
+				done
+				;;
+			@*) ;;
+			*)
+				for path in "${paths[@]}"; do
+					case "$path" in
+					"$input"|"$input"/*) selected[$name]=1 ;;
+					esac
+				done
+				;;
+			esac
+		done
+	done
+
+	while :; do
+		grown=""
+		for name in "${STEP_ORDER[@]}"; do
+			[ -z "${selected[$name]}" ] || continue
+			for input in ${STEP_AFTER[$name]}; do
+				[ -z "${selected[$input]}" ] || {
+					selected[$name]=1
+					grown=1
+				}
+			done
+		done
+		[ -n "$grown" ] || break
+	done
+
+	for name in "${STEP_ORDER[@]}"; do
+		[ -z "${selected[$name]}" ] || printf '%s\n' "$name"
+	done
+}
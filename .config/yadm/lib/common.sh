@@ -0,0 +1,39 @@
+# Helpers shared by the bootstrap and the steps in bootstrap.d/.
+
+: "${YADM_REPO:=${XDG_DATA_HOME:-$HOME/.local/share}/yadm/repo.git}"
+: "${BOOTSTRAP_JOBS:=$(nproc 2>/dev/null || echo 4)}"
+export YADM_REPO
+
+log() {
+	printf '%s\n' "$*"
+}
+
+warn() {
+	printf 'bootstrap: %s\n' "$*" >&2
+}
+
+die() {
+	warn "$*"
+	exit 1
+}
+
+# git against the yadm repo without paying for the yadm wrapper
+ygit() {
+	git --git-dir="$YADM_REPO" --work-tree="$HOME" "$@"
+}
+
+# step_header FILE KEY: value of a "# KEY: value" line in the leading comment block
+step_header() {
+	local line
+	while IFS= read -r line; do
+		case "$line" in
+		"# $2:"*)
+			line="${line#"# $2:"}"
+			printf '%s\n' "${line#"${line%%[![:space:]]*}"}"
+			return 0
+			;;
+		'#'*) ;;
+		*) return 0 ;;
+		esac
+	done < "$1"
+}
@@ -0,0 +1,22 @@
+# The generated env file: the exports the dotfiles rely on, sourced by the
+# bootstrap instead of the whole interactive rc and by the managed block in
+# .bashrc (see bashrc.sh), so both get the same environment.
+
+: "${BOOTSTRAP_ENV_FILE:=$HOME/.config/yadm/env}"
+
+env_exports() {
+	cat <<'EXPORTS'
+export SYSTEM_CONF="$HOME/.config/system_conf"
+export YADM_REPO="${YADM_REPO:-${XDG_DATA_HOME:-$HOME/.local/share}/yadm/repo.git}"
+EXPORTS
+}
+
+# env_write: regenerate the env file when its contents would change
+env_write() {
+	local exports
+	exports="$(env_exports)"
+	[ -f "$BOOTSTRAP_ENV_FILE" ] && [ "$(< "$BOOTSTRAP_ENV_FILE")" = "$exports" ] && return 0
+	mkdir -p "${BOOTSTRAP_ENV_FILE%/*}" &&
+		printf '%s\n' "$exports" > "$BOOTSTRAP_ENV_FILE.tmp.$$" &&
+		mv -f "$BOOTSTRAP_ENV_FILE.tmp.$$" "$BOOTSTRAP_ENV_FILE"
+}
@@ -0,0 +1,235 @@
+# Terminal fonts: the families system_conf/font.conf asks for.
+#
+# The fonts step makes sure every family and face font.conf names is
+# installed, copying missing ones into ~/.local/share/fonts/yadm from a
+# content-addressed font cache (default: BOOTSTRAP_CACHE/fonts). Its
+# objects/<sha256> are the font files, and its index has one tab-separated
+# "sha256 family style full-name file-name" line per face. `bootstrap
+# font-add FILE...` adds fonts to it. fc-cache runs only when the set of
+# user fonts changed.
+#
+# font_family in font.conf lists the primary family followed by fallbacks,
+# but the terminal resolves only one family and searches the rest glyph by
+# glyph at render time. The fontmap step reads each family's coverage from
+# fontconfig and writes symbol_map lines to font-symbols.conf, which
+# font.conf includes, so whole script ranges go straight to the font that
+# has them.
+
+: "${BOOTSTRAP_FONTS:=$BOOTSTRAP_CACHE/fonts}"
+FONT_DIR="${XDG_DATA_HOME:-$HOME/.local/share}/fonts"
+
+# Ranges worth mapping, as "first-last name" in hex
+FONT_RANGES=(
+	"1100-11ff Hangul Jamo"
+	"3130-318f Hangul Compatibility Jamo"
+	"ac00-d7a3 Hangul Syllables"
+	"3000-303f CJK Symbols and Punctuation"
+	"4e00-9fff CJK Unified Ideographs"
+	"ff00-ffef Halfwidth and Fullwidth Forms"
+	"2500-257f Box Drawing"
+	"2580-259f Block Elements"
+)
+
+# font_families [CONF]: the families of the font_family line, primary first
+font_families() {
+	local key value family
+	local -a families
+	while read -r key value; do
+		[ "$key" = font_family ] || continue
+		IFS=, read -r -a families <<< "$value"
+		for family in "${families[@]}"; do
+			family="${family#"${family%%[![:space:]]*}"}"
+			printf '%s\n' "${family%"${family##*[![:space:]]}"}"
+		done
+		return 0
+	done < "${1:-$SYSTEM_CONF/font.conf}"
+}
+
+# font_names [CONF]: every family and face font.conf names, one per line
+font_names() {
+	local key value
+	font_families "$@"
+	while read -r key value; do
+		case "$key" in
+		bold_font|italic_font|bold_italic_font) [ "$value" = auto ] || printf '%s\n' "$value" ;;
+		esac
+	done < "${1:-$SYSTEM_CONF/font.conf}"
+}
+
+# font_pattern NAME: NAME with the characters fontconfig patterns treat specially escaped
+font_pattern() {
+	printf '%s' "$1" | sed 's/[-:,\\]/\\&/g'
+}
+
+# font_installed NAME: whether fontconfig knows a family or a face by the full NAME
+font_installed() {
+	local name
+	name="$(font_pattern "$1")"
+	[ -n "$(fc-list ":family=$name" family)" ] || [ -n "$(fc-list ":fullname=$name" family)" ]
+}
+
+# font_missing: the names from font.conf that are not installed
+font_missing() {
+	local name
+	font_names | while IFS= read -r name; do
+		font_installed "$name" || printf '%s\n' "$name"
+	done
+}
+
+# font_cached NAME: index lines of the cached faces NAME refers to, as a family or a full name
+font_cached() {
+	[ -f "$BOOTSTRAP_FONTS/index" ] || return 0
+	awk -F '\t' -v name="$1" 'tolower($2) == tolower(name) || tolower($4) == tolower(name)' "$BOOTSTRAP_FONTS/index"
+}
+
+# font_add FILE...: add font files to the font cache
+font_add() {
+	local file sha family style fullname
+	[ $# -gt 0 ] || die "usage: bootstrap font-add FILE..."
+	mkdir -p "$BOOTSTRAP_FONTS/objects" || return 1
+	for file in "$@"; do
+		sha="$(sha256sum < "$file")" || return 1
+		sha="${sha%% *}"
+		IFS=$'\t' read -r family style fullname < <(fc-scan --format '%{family[0]}\t%{style[0]}\t%{fullname[0]}\n' "$file")
+		[ -n "$family" ] || die "$file is not a font fontconfig can read"
+		if [ ! -f "$BOOTSTRAP_FONTS/objects/$sha" ]; then
+			cp "$file" "$BOOTSTRAP_FONTS/objects/$sha.tmp" &&
+				mv -f "$BOOTSTRAP_FONTS/objects/$sha.tmp" "$BOOTSTRAP_FONTS/objects/$sha" || return 1
+		fi
+		grep -q "^$sha"$'\t' "$BOOTSTRAP_FONTS/index" 2> /dev/null ||
+			printf '%s\t%s\t%s\t%s\t%s\n' "$sha" "$family" "$style" "${fullname:-$family $style}" "${file##*/}" >> "$BOOTSTRAP_FONTS/index"
+		log "cached $family $style ($sha)"
+	done
+}
+
+# font_install NAME: copy the cached faces of NAME into FONT_DIR; fails when none are cached
+font_install() {
+	local sha file found=1 actual
+	mkdir -p "$FONT_DIR/yadm" || return 1
+	while IFS=$'\t' read -r sha _ _ _ file; do
+		actual="$(sha256sum < "$BOOTSTRAP_FONTS/objects/$sha")" && [ "${actual%% *}" = "$sha" ] || {
+			warn "cached font $sha is damaged, skipping it"
+			continue
+		}
+		cp "$BOOTSTRAP_FONTS/objects/$sha" "$FONT_DIR/yadm/$file.tmp" &&
+			mv -f "$FONT_DIR/yadm/$file.tmp" "$FONT_DIR/yadm/$file" || return 1
+		found=0
+	done < <(font_cached "$1")
+	return "$found"
+}
+
+# font_cache_update: run fc-cache on FONT_DIR when the files in it changed since the last run
+font_cache_update() {
+	local stamp="$BOOTSTRAP_CACHE/fontconfig" fingerprint
+	fingerprint="$( { [ ! -d "$FONT_DIR" ] || find "$FONT_DIR" -type f -printf '%P %s %T@\n'; } | LC_ALL=C sort | git hash-object --stdin)"
+	[ ! -f "$stamp" ] || [ "$(< "$stamp")" != "$fingerprint" ] || return 0
+	log "updating the fontconfig cache"
+	[ ! -d "$FONT_DIR" ] || fc-cache "$FONT_DIR" || return 1
+	printf '%s\n' "$fingerprint" > "$stamp"
+}
+
+plan_fonts() {
+	local name
+	if ! command -v fc-list > /dev/null; then
+		echo "fontconfig is not installed, nothing to check"
+		return 0
+	fi
+	font_missing | while IFS= read -r name; do
+		if [ -n "$(font_cached "$name")" ]; then
+			printf '%s: install from the font cache\n' "$name"
+		else
+			printf '%s: missing, and not in the font cache\n' "$name"
+		fi
+	done
+}
+
+# font_charset FAMILY: the code point ranges the installed FAMILY covers, as fontconfig reports them
+font_charset() {
+	fc-list --format '%{charset}\n' ":family=$(font_pattern "$1")" | head -n 1
+}
+
+# font_symbol_map: symbol_map lines sending each range to the first family that covers it
+#
+# A range the primary family covers completely is left alone. Otherwise it
+# goes to the first fallback that covers it completely. Failing that, only
+# the parts of it that the fallback covering the most of it has are mapped,
+# since symbol_map would leave every other code point without a glyph.
+font_symbol_map() {
+	local family
+	{
+		printf '%s\n' "${FONT_RANGES[@]}" | sed 's/^/range /'
+		font_families | while IFS= read -r family; do
+			printf 'font %s\t%s\n' "$family" "$(font_charset "$family")"
+		done
+	} | awk -F '\t' '
+		function hex(s,    i, n) {
+			s = tolower(s)
+			for (i = 1; i <= length(s); i++) n = n * 16 + index("0123456789abcdef", substr(s, i, 1)) - 1
+			return n
+		}
+		# parts(F, I): the ranges of charset F that fall inside range I, as symbol_map ranges
+		function parts(f, i,    n, ranges, j, b, a, z, out) {
+			n = split(cs[f], ranges, " ")
+			for (j = 1; j <= n; j++) {
+				split(ranges[j], b, "-")
+				a = hex(b[1]); z = b[2] == "" ? a : hex(b[2])
+				if (a < lo[i]) a = lo[i]
+				if (z > hi[i]) z = hi[i]
+				if (z >= a) out = out (out == "" ? "" : ",") sprintf("U+%04X-U+%04X", a, z)
+			}
+			return out
+		}
+		/^range / {
+			split(substr($0, 7), r, " ")
+			split(r[1], b, "-")
+			nr++
+			lo[nr] = hex(b[1]); hi[nr] = hex(b[2])
+			next
+		}
+		{
+			nf++
+			name[nf] = substr($1, 6)
+			cs[nf] = $2
+			n = split($2, ranges, " ")
+			for (i = 1; i <= nr; i++) {
+				c = 0
+				for (j = 1; j <= n; j++) {
+					split(ranges[j], b, "-")
+					a = hex(b[1]); z = b[2] == "" ? a : hex(b[2])
+					if (a < lo[i]) a = lo[i]
+					if (z > hi[i]) z = hi[i]
+					if (z >= a) c += z - a + 1
+				}
+				cover[nf, i] = c
+			}
+		}
+		END {
+			for (i = 1; i <= nr; i++) {
+				size = hi[i] - lo[i] + 1
+				if (nf == 0 || cover[1, i] == size) continue
+				best = 0
+				for (f = 2; f <= nf; f++) {
+					if (cover[f, i] == size) { best = f; break }
+					if (cover[f, i] > (best ? cover[best, i] : 0)) best = f
+				}
+				if (!best) continue
+				if (!(best in map)) order[++no] = best
+				map[best] = map[best] (map[best] == "" ? "" : ",") parts(best, i)
+			}
+			for (k = 1; k <= no; k++) printf "symbol_map %s %s\n", map[order[k]], name[order[k]]
+		}'
+}
+
+# font_map_write: regenerate font-symbols.conf, replacing it only when it changes
+font_map_write() {
+	local out="$SYSTEM_CONF/font-symbols.conf"
+	{
+		printf '# Generated by the fontmap bootstrap step from font_family in font.conf; do not edit.\n'
+		font_symbol_map
+	} > "$out.tmp" || return 1
+	if cmp -s "$out.tmp" "$out"; then
+		rm -f "$out.tmp"
+	else
+		mv -f "$out.tmp" "$out"
+	fi
+}
@@ -0,0 +1,49 @@
+# One bootstrap at a time, with concurrent callers sharing its result.
+#
+# The run holds an flock on $BOOTSTRAP_CACHE/lock and, before letting go,
+# writes "<run id> <exit status> <request>" to $BOOTSTRAP_CACHE/result,
+# where the request is a hash of its arguments, its host profile and the
+# yadm HEAD it started from. A caller that finds the lock taken waits for
+# it and, when a new result for the same request appeared in the meantime,
+# exits with that status instead of starting a redundant run of its own.
+# Otherwise, when the run asked for other work or died without a result,
+# it runs itself; unchanged steps make that second run cheap.
+
+# lock_request: hash of what this run was asked to do
+lock_request() {
+	printf '%s\n' "$BOOTSTRAP_PROFILE" "$(ygit rev-parse -q --verify HEAD)" "${BOOTSTRAP_ARGS[@]}" |
+		git hash-object --stdin
+}
+
+lock_acquire() {
+	local before="" id status request
+	command -v flock > /dev/null || {
+		warn "flock not found, running without a lock"
+		return 0
+	}
+	BOOTSTRAP_REQUEST="$(lock_request)"
+	# read before trying the lock, so a run that finishes in between still counts
+	[ ! -f "$BOOTSTRAP_CACHE/result" ] || before="$(< "$BOOTSTRAP_CACHE/result")"
+	mkdir -p "$BOOTSTRAP_CACHE" && exec {BOOTSTRAP_LOCK_FD}> "$BOOTSTRAP_CACHE/lock" || return 1
+	flock -n "$BOOTSTRAP_LOCK_FD" && return 0
+
+	log "another bootstrap is running, waiting for its result"
+	flock "$BOOTSTRAP_LOCK_FD" || return 1
+	[ -f "$BOOTSTRAP_CACHE/result" ] || return 0
+	[ "$(< "$BOOTSTRAP_CACHE/result")" != "$before" ] || return 0
+	read -r id status request < "$BOOTSTRAP_CACHE/result"
+	[ "$request" = "$BOOTSTRAP_REQUEST" ] || {
+		log "that run did other work, running now"
+		return 0
+	}
+	log "sharing the result of that run"
+	exit "$status"
+}
+
+# lock_release STATUS: publish STATUS as the result of this run
+lock_release() {
+	[ -n "$BOOTSTRAP_LOCK_FD" ] || return 0
+	printf '%s-%s %s %s\n' "$$" "$(now_us)" "$1" "$BOOTSTRAP_REQUEST" > "$BOOTSTRAP_CACHE/result.tmp.$$" &&
+		mv -f "$BOOTSTRAP_CACHE/result.tmp.$$" "$BOOTSTRAP_CACHE/result"
+	exec {BOOTSTRAP_LOCK_FD}>&-
+}
@@ -0,0 +1,84 @@
+# The login stamp: what a successful full bootstrap last saw.
+#
+# The stamp records the yadm HEAD commit, the host profile and the commit
+# each submodule has checked out. login_current compares them with what is
+# on disk using only builtins and file reads, so login-check can run on
+# every login and exit in a few milliseconds when nothing changed. Kept free
+# of the other libs because it is sourced on that fast path.
+
+LOGIN_STAMP="$BOOTSTRAP_CACHE/login"
+
+# login_ref GITDIR: set LOGIN_REF to the commit HEAD of GITDIR resolves to
+login_ref() {
+	local head sha ref
+	LOGIN_REF=""
+	[ -r "$1/HEAD" ] && read -r head < "$1/HEAD" || return 1
+	case "$head" in
+	"ref: "*) ref="${head#ref: }" ;;
+	*)
+		LOGIN_REF="$head"
+		return 0
+		;;
+	esac
+	if [ -r "$1/$ref" ]; then
+		read -r LOGIN_REF < "$1/$ref"
+		return 0
+	fi
+	[ -r "$1/packed-refs" ] || return 1
+	while read -r sha head; do
+		[ "$head" = "$ref" ] || continue
+		LOGIN_REF="$sha"
+		return 0
+	done < "$1/packed-refs"
+	return 1
+}
+
+# login_checkout PATH: set LOGIN_REF to the commit the submodule at PATH has checked out
+login_checkout() {
+	local gitdir="$HOME/$1/.git"
+	if [ -f "$gitdir" ]; then
+		read -r _ gitdir < "$gitdir" || return 1
+		case "$gitdir" in
+		/*) ;;
+		*) gitdir="$HOME/$1/$gitdir" ;;
+		esac
+	fi
+	login_ref "$gitdir"
+}
+
+# login_profile: set LOGIN_PROFILE to the profile the next bootstrap would use
+login_profile() {
+	LOGIN_PROFILE="$BOOTSTRAP_PROFILE"
+	[ -n "$LOGIN_PROFILE" ] || [ ! -r "$BOOTSTRAP_CACHE/profile" ] || read -r LOGIN_PROFILE < "$BOOTSTRAP_CACHE/profile"
+}
+
+# login_current: whether the stamp still matches the yadm HEAD, profile and checkouts
+login_current() {
+	local kind key value
+	[ -r "$LOGIN_STAMP" ] || return 1
+	while read -r kind key value; do
+		case "$kind" in
+		head) login_ref "$YADM_REPO" ;;
+		profile) login_profile && LOGIN_REF="$LOGIN_PROFILE" ;;
+		module) login_checkout "$key" || LOGIN_REF=- ;;
+		*) return 1 ;;
+		esac
+		[ "$LOGIN_REF" = "${value:-$key}" ] || return 1
+	done < "$LOGIN_STAMP"
+}
+
+# login_write: stamp the current state after a successful bootstrap
+login_write() {
+	local mode sha path
+	{
+		login_ref "$YADM_REPO" || return 1
+		printf 'head %s\n' "$LOGIN_REF"
+		login_profile
+		printf 'profile %s\n' "$LOGIN_PROFILE"
+		ygit ls-files -s | while read -r mode sha _ path; do
+			[ "$mode" = 160000 ] && profile_submodule "$path" || continue
+			login_checkout "$path" || LOGIN_REF=""
+			printf 'module %s %s\n' "$path" "${LOGIN_REF:--}"
+		done
+	} > "$LOGIN_STAMP.tmp" && mv "$LOGIN_STAMP.tmp" "$LOGIN_STAMP"
+}
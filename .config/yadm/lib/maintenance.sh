@@ -0,0 +1,75 @@
+# Background maintenance of the yadm repo, its submodules and the object cache.
+#
+# `bootstrap maintenance` writes commit-graphs, repacks incrementally,
+# packs loose objects and packs refs in every one of those repos, so yadm
+# commands do not slow down as objects pile up. None of these tasks prune
+# objects; submodules own their objects, so the mirrors only need to stay
+# consistent with themselves. It runs from the yadm-maintenance systemd
+# user timer, or from cron where there is no systemd user manager, and
+# skips its turn while a bootstrap is running. Crontabs and the systemd user
+# manager belong to the user, not to $HOME, so setting BOOTSTRAP_NO_SCHEDULE
+# (as the benchmarks do for their throwaway homes) leaves both alone.
+
+MAINTENANCE_TASKS=(loose-objects incremental-repack commit-graph pack-refs)
+
+# maintenance_repos: the git directories to maintain
+maintenance_repos() {
+	local gitdir
+	printf '%s\n' "$YADM_REPO"
+	[ ! -d "$YADM_REPO/modules" ] || find "$YADM_REPO/modules" -name config -type f | while IFS= read -r gitdir; do
+		gitdir="${gitdir%/config}"
+		[ ! -d "$gitdir/objects" ] || printf '%s\n' "$gitdir"
+	done
+	for gitdir in "$BOOTSTRAP_OBJECTS"/objects/*.git; do
+		[ ! -d "$gitdir" ] || printf '%s\n' "$gitdir"
+	done
+}
+
+maintenance_run() {
+	local fd gitdir task rc=0
+	if command -v flock > /dev/null; then
+		mkdir -p "$BOOTSTRAP_CACHE" && exec {fd}> "$BOOTSTRAP_CACHE/lock" || return 1
+		flock -n "$fd" || {
+			log "a bootstrap is running, skipping maintenance"
+			return 0
+		}
+	fi
+	while IFS= read -r gitdir; do
+		log "maintaining ${gitdir#"$HOME/"}"
+		for task in "${MAINTENANCE_TASKS[@]}"; do
+			# a repo without packs, e.g. an empty one, has nothing to repack
+			[ "$task" != incremental-repack ] || compgen -G "$gitdir/objects/pack/*.pack" > /dev/null || continue
+			git --git-dir="$gitdir" maintenance run --quiet --task="$task" > /dev/null || {
+				warn "$task failed in $gitdir"
+				rc=1
+			}
+		done
+	done < <(maintenance_repos)
+	return "$rc"
+}
+
+# maintenance_register: run `bootstrap maintenance` daily from systemd or cron
+maintenance_register() {
+	local cmd="$BOOTSTRAP_DIR/bootstrap maintenance" tab line
+	if [ -n "$BOOTSTRAP_NO_SCHEDULE" ]; then
+		log "BOOTSTRAP_NO_SCHEDULE is set, not scheduling '$cmd'"
+		return 0
+	fi
+	if systemctl --user show-environment > /dev/null 2>&1; then
+		systemctl --user daemon-reload && systemctl --user enable --now yadm-maintenance.timer
+		return
+	fi
+	if ! command -v crontab > /dev/null; then
+		log "no systemd user manager or crontab; run '$cmd' periodically yourself"
+		return 0
+	fi
+	tab="$(crontab -l 2> /dev/null)"
+	line="$cmd > /dev/null 2>&1 # yadm-maintenance"
+	case "$tab" in
+	*"$line"*) return 0 ;;
+	esac
+	{
+		printf '%s\n' "$tab" | grep -v '# yadm-maintenance$' | sed '/^$/d'
+		printf '%d %d * * * %s\n' $((RANDOM % 60)) $((2 + RANDOM % 4)) "$line"
+	} | crontab -
+}
@@ -0,0 +1,42 @@
+# `bootstrap --plan`: what a run would do, without doing it.
+#
+# Lists every step as run, skip (fingerprint unchanged) or off (left out by
+# the host profile, --only or --since) with the median wall time of its
+# previous runs from the history reports. A step can add detail by defining
+# plan_<step> in its library; that function must only inspect, never
+# change, anything.
+
+# plan_estimate STEP: median seconds of the step's completed runs, or "-"
+plan_estimate() {
+	cat "$BOOTSTRAP_CACHE"/history/*.json 2>/dev/null |
+		sed -n "s/^{\"name\": \"$1\", \"status\": \"done\".*\"wall_s\": \([0-9.]*\).*/\1/p" |
+		sort -n | awk '
+			{ v[NR] = $1 }
+			END {
+				if (!NR) { print "-"; exit }
+				mid = int((NR + 1) / 2)
+				printf "%.2fs\n", NR % 2 ? v[mid] : (v[mid] + v[mid + 1]) / 2
+			}'
+}
+
+plan_run() {
+	local name action
+	scheduler_load
+	printf 'profile %s\n\n' "$BOOTSTRAP_PROFILE"
+	printf '%-16s %-6s %10s  %s\n' step action estimate after
+	for name in "${STEP_ORDER[@]}"; do
+		if [ "${STEP_STATE[$name]}" = excluded ]; then
+			action=off
+		elif state_current "$name"; then
+			action=skip
+		else
+			action=run
+		fi
+		printf '%-16s %-6s %10s  %s\n' "$name" "$action" "$(plan_estimate "$name")" "${STEP_AFTER[$name]:--}"
+		if [ "$action" = run ] && declare -F "plan_$name" > /dev/null; then
+			"plan_$name" | while IFS= read -r line; do
+				printf '    %s\n' "$line"
+			done
+		fi
+	done
+}
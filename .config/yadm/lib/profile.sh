@@ -0,0 +1,49 @@
+# Host profiles: which steps and which submodules a machine gets.
+#
+# A profile is a file in profiles/ that sets PROFILE_STEPS and
+# PROFILE_SUBMODULES to space-separated globs over step names and submodule
+# paths. The profile is --profile or BOOTSTRAP_PROFILE, else the one used
+# last time, else yadm's local.class when a profile of that name exists,
+# else desktop. Steps left out are treated as done by the steps after them.
+
+profile_load() {
+	local name="$BOOTSTRAP_PROFILE" class
+	[ -n "$name" ] || [ ! -f "$BOOTSTRAP_CACHE/profile" ] || read -r name < "$BOOTSTRAP_CACHE/profile"
+	if [ -z "$name" ]; then
+		class="$(git config -f "${YADM_DIR:-$HOME/.config/yadm}/config" local.class 2> /dev/null | tr '[:upper:]' '[:lower:]')"
+		[ -z "$class" ] || [ ! -f "$BOOTSTRAP_DIR/profiles/$class" ] || name="$class"
+	fi
+	name="${name:-desktop}"
+	[ -f "$BOOTSTRAP_DIR/profiles/$name" ] ||
+		die "unknown profile '$name' (have: $(cd "$BOOTSTRAP_DIR/profiles" && echo *))"
+
+	PROFILE_STEPS='*'
+	PROFILE_SUBMODULES='*'
+	. "$BOOTSTRAP_DIR/profiles/$name"
+	BOOTSTRAP_PROFILE="$name"
+}
+
+# profile_save: remember the profile for later runs
+profile_save() {
+	[ -f "$BOOTSTRAP_CACHE/profile" ] && [ "$(< "$BOOTSTRAP_CACHE/profile")" = "$BOOTSTRAP_PROFILE" ] && return 0
+	mkdir -p "$BOOTSTRAP_CACHE" && printf '%s\n' "$BOOTSTRAP_PROFILE" > "$BOOTSTRAP_CACHE/profile"
+}
+
+# profile_match GLOBS NAME
+profile_match() {
+	local glob
+	local -a globs
+	read -r -a globs <<< "$1"
+	for glob in "${globs[@]}"; do
+		[[ $2 == $glob ]] && return 0
+	done
+	return 1
+}
+
+profile_step() {
+	profile_match "$PROFILE_STEPS" "$1"
+}
+
+profile_submodule() {
+	profile_match "$PROFILE_SUBMODULES" "$1"
+}
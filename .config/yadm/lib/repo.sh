@@ -0,0 +1,42 @@
+# Settings that keep `yadm status` fast when the worktree is all of $HOME.
+#
+# Untracked files are hidden by default, so a plain status only stats the
+# tracked paths; the untracked cache makes an explicit `status -u` cheap
+# after the first one; a filesystem monitor, where one is available, spares
+# even the stats; and index v4 shrinks the index git reads every time.
+# A sparse index is not used: it only collapses directories outside a cone
+# sparse checkout, and the cone here would have to hold every tracked path.
+
+# repo_fsmonitor GITDIR WORKTREE: core.fsmonitor value for this machine, if any
+repo_fsmonitor() {
+	local hook status rc
+	# 0 is a running daemon, 1 with "not watching" a supported but stopped one;
+	# git without the daemon also exits 1, for an unknown command
+	status="$(LC_ALL=C git --git-dir="$1" --work-tree="$2" fsmonitor--daemon status 2>&1)"
+	rc=$?
+	if [ "$rc" -eq 0 ] || { [ "$rc" -eq 1 ] && [[ $status == *"not watching"* ]]; }; then
+		echo true
+		return 0
+	fi
+	command -v watchman > /dev/null || return 1
+	hook="$1/hooks/fsmonitor-watchman"
+	if [ ! -x "$hook" ]; then
+		cp "$1/hooks/fsmonitor-watchman.sample" "$hook" 2> /dev/null ||
+			cp "$(git --exec-path)/../../share/git-core/templates/hooks/fsmonitor-watchman.sample" "$hook" ||
+			return 1
+		chmod +x "$hook"
+	fi
+	printf '%s\n' "$hook"
+}
+
+# repo_tune GITDIR WORKTREE
+repo_tune() {
+	local fsmonitor
+	git --git-dir="$1" config status.showUntrackedFiles no &&
+		git --git-dir="$1" config core.untrackedCache true &&
+		git --git-dir="$1" config index.version 4 || return 1
+	if fsmonitor="$(repo_fsmonitor "$1" "$2")"; then
+		git --git-dir="$1" config core.fsmonitor "$fsmonitor" || return 1
+	fi
+	git --git-dir="$1" --work-tree="$2" update-index --index-version 4 --untracked-cache
+}
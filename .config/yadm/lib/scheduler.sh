@@ -0,0 +1,190 @@
+# Dependency-aware step scheduler.
+#
+# Every bootstrap.d/<name>.sh is a step. A step lists the steps it must run
+# after in a "# after: a b" header line; steps with no pending dependencies
+# run concurrently, at most BOOTSTRAP_JOBS at a time. Each step is sourced
+# in its own subshell with `set -e`, so a failing command fails the step and
+# every step that depends on it is skipped. Steps whose fingerprint (see
+# state.sh) is unchanged since their last successful run are not re-run.
+# Each run is timed step by step into a JSON report (see telemetry.sh) and,
+# with --trace, into a trace-event file (see trace.sh).
+# On SIGINT, SIGTERM or SIGHUP the running steps are killed and left marked
+# as interrupted, so the next run resumes from the steps that completed.
+# Steps the host profile leaves out (see profile.sh), and steps not named
+# in BOOTSTRAP_ONLY when it is set, count as done.
+
+declare -A STEP_FILE=() STEP_AFTER=() STEP_STATE=() STEP_ROW=() STEP_PID=()
+declare -a STEP_ORDER=()
+
+scheduler_load() {
+	local file name dep
+	STEP_FILE=()
+	STEP_AFTER=()
+	STEP_STATE=()
+	STEP_ORDER=()
+	STEP_ROW=()
+	STEP_PID=()
+	for file in "$BOOTSTRAP_DIR"/bootstrap.d/*.sh; do
+		[ -f "$file" ] || continue
+		name="$(basename "$file" .sh)"
+		STEP_FILE[$name]="$file"
+		STEP_AFTER[$name]="$(step_header "$file" after)"
+		STEP_STATE[$name]=pending
+		profile_step "$name" || STEP_STATE[$name]=excluded
+		[ -z "${BOOTSTRAP_ONLY+set}" ] || [[ " $BOOTSTRAP_ONLY " == *" $name "* ]] || STEP_STATE[$name]=excluded
+		STEP_ORDER+=("$name")
+		STEP_ROW[$name]="${#STEP_ORDER[@]}"
+	done
+	for name in $BOOTSTRAP_ONLY; do
+		[ -n "${STEP_FILE[$name]}" ] || die "unknown step '$name' (have: ${STEP_ORDER[*]})"
+	done
+	for name in "${STEP_ORDER[@]}"; do
+		for dep in ${STEP_AFTER[$name]}; do
+			[ -n "${STEP_FILE[$dep]}" ] || die "step '$name' depends on unknown step '$dep'"
+		done
+	done
+}
+
+# ready NAME: 0 when runnable, 1 when still waiting, 2 when a dependency failed
+scheduler_ready() {
+	local dep
+	for dep in ${STEP_AFTER[$1]}; do
+		case "${STEP_STATE[$dep]}" in
+		done|excluded) ;;
+		failed|skipped) return 2 ;;
+		*) return 1 ;;
+		esac
+	done
+	return 0
+}
+
+scheduler_exec() {
+	local name=$1 line rc start
+	start="$(now_us)"
+	BOOTSTRAP_STEP=$name
+	if state_current "$name"; then
+		printf '[%s] up to date\n' "$name"
+		telemetry_step "$name" current 0 "$start"
+		trace_event "$name" step "$start" "$(now_us)" "${STEP_ROW[$name]}" '{"status": "current"}'
+		echo 0 > "$SCHED_DIR/$name.rc.tmp" && mv -f "$SCHED_DIR/$name.rc.tmp" "$SCHED_DIR/$name.rc"
+		return 0
+	fi
+	BOOTSTRAP_RESUMING=""
+	if state_interrupted "$name"; then
+		BOOTSTRAP_RESUMING=1
+		printf '[%s] resuming after an interrupted run\n' "$name"
+	fi
+	state_begin "$name"
+	(
+		set -o pipefail
+		(
+			set -e
+			[ -z "$BOOTSTRAP_LOCK_FD" ] || exec {BOOTSTRAP_LOCK_FD}>&-
+			. "${STEP_FILE[$name]}"
+		) 2>&1 | while IFS= read -r line; do
+			printf '[%s] %s\n' "$name" "$line"
+		done
+	)
+	rc=$?
+	state_end "$name"
+	if [ "$rc" -eq 0 ]; then
+		state_record "$name" || warn "could not record state for $name"
+		telemetry_step "$name" done 0 "$start"
+	else
+		telemetry_step "$name" failed "$rc" "$start"
+	fi
+	trace_event "$name" step "$start" "$(now_us)" "${STEP_ROW[$name]}" "{\"exit\": $rc}"
+	echo "$rc" > "$SCHED_DIR/$name.rc.tmp" && mv -f "$SCHED_DIR/$name.rc.tmp" "$SCHED_DIR/$name.rc"
+	return "$rc"
+}
+
+# scheduler_kill PID: kill PID before its descendants, so no step gets to clean up after itself
+scheduler_kill() {
+	local child children
+	children="$(pgrep -P "$1")"
+	kill "$1" 2> /dev/null
+	for child in $children; do
+		scheduler_kill "$child"
+	done
+}
+
+scheduler_abort() {
+	local pid
+	trap - INT TERM HUP
+	warn "interrupted; the next run resumes after the completed steps"
+	for pid in $(jobs -p); do
+		scheduler_kill "$pid"
+	done
+	wait
+	exit 130
+}
+
+scheduler_run() {
+	local name rc running=0 progress failed=0 start waited
+
+	start="$(now_us)"
+	BOOTSTRAP_TRACE_T0="$start"
+	scheduler_load
+	SCHED_DIR="$(mktemp -d "${TMPDIR:-/tmp}/bootstrap.XXXXXX")"
+	trap 'rm -rf "$SCHED_DIR"' EXIT
+	trap scheduler_abort INT TERM HUP
+
+	while :; do
+		progress=0
+		for name in "${STEP_ORDER[@]}"; do
+			[ "${STEP_STATE[$name]}" = pending ] || continue
+			[ "$running" -lt "$BOOTSTRAP_JOBS" ] || break
+			scheduler_ready "$name"
+			case $? in
+			0)
+				STEP_STATE[$name]=running
+				scheduler_exec "$name" &
+				STEP_PID[$name]=$!
+				running=$((running + 1))
+				progress=1
+				;;
+			2)
+				STEP_STATE[$name]=skipped
+				warn "skipping $name: a dependency failed"
+				failed=1
+				progress=1
+				;;
+			esac
+		done
+
+		if [ "$running" -eq 0 ]; then
+			[ "$progress" -eq 1 ] && continue
+			for name in "${STEP_ORDER[@]}"; do
+				[ "${STEP_STATE[$name]}" = pending ] && die "dependency cycle involving step '$name'"
+			done
+			break
+		fi
+
+		wait -n
+		waited=$?
+		for name in "${STEP_ORDER[@]}"; do
+			[ "${STEP_STATE[$name]}" = running ] || continue
+			if [ -f "$SCHED_DIR/$name.rc" ]; then
+				rc="$(< "$SCHED_DIR/$name.rc")"
+			elif [ "$waited" -eq 127 ] || ! kill -0 "${STEP_PID[$name]}" 2> /dev/null; then
+				# the runner itself was killed before it could record a status
+				warn "step $name died without an exit status"
+				rc=137
+			else
+				continue
+			fi
+			running=$((running - 1))
+			if [ "$rc" -eq 0 ]; then
+				STEP_STATE[$name]=done
+			else
+				STEP_STATE[$name]=failed
+				warn "step $name failed with status $rc"
+				failed=1
+			fi
+		done
+	done
+
+	telemetry_report "$start" "$failed" > /dev/null || warn "could not write the run report"
+	trace_write || warn "could not write the trace to $BOOTSTRAP_TRACE"
+	return "$failed"
+}
@@ -0,0 +1,107 @@
+# Interactive shell startup profiler.
+#
+# startup_trace starts `bash -i -c exit` with a wrapper rcfile that turns on
+# xtrace before sourcing ~/.bashrc, with EPOCHREALTIME and the source
+# location in PS4 and the trace sent to a file. startup_report charges the
+# time until the next traced line to each line, then sums it per file and
+# per command. Lines of a compiled file that has a <file>.map next to it
+# (see system_conf/compile.sh) are charged to the snippet they came from.
+
+# startup_trace OUT: write a startup trace of an interactive shell to OUT
+startup_trace() {
+	local rcfile
+	rcfile="$(mktemp "${TMPDIR:-/tmp}/startup-rc.XXXXXX")" || return 1
+	cat > "$rcfile" <<'RC'
+exec {__startup_fd}>"$__STARTUP_TRACE"
+BASH_XTRACEFD=$__startup_fd
+PS4='+ ${EPOCHREALTIME} ${BASH_SOURCE[0]:-main}:${LINENO} '
+set -x
+[ -f "$HOME/.bashrc" ] && . "$HOME/.bashrc"
+set +x
+RC
+	__STARTUP_TRACE="$1" bash --rcfile "$rcfile" -i -c exit < /dev/null > /dev/null 2>&1
+	rm -f "$rcfile"
+	[ -s "$1" ]
+}
+
+# startup_costs TRACE: tab-separated totals, "T ms lines", "F ms file" and "C ms location command"
+startup_costs() {
+	awk '
+		!/^\++ [0-9]+[.,][0-9]+ / { next }
+		{
+			sub(/^\++ /, "")
+			t = $1
+			sub(/,/, ".", t)
+			loc = $2
+			sub(/^[^ ]+ [^ ]+ ?/, "")
+			f = loc
+			sub(/:[0-9]+$/, "", f)
+			if (!(f in mapped)) {
+				mapped[f] = 1
+				while ((getline l < (f ".map")) > 0) {
+					split(l, m, "\t")
+					origin[f ":" m[1]] = m[2] ":" m[3]
+				}
+				close(f ".map")
+			}
+			if (loc in origin) loc = origin[loc]
+			if (n++) {
+				dt = (t - prev) * 1000
+				file[prevfile] += dt
+				cmd[prevloc "\t" prevcmd] += dt
+				total += dt
+			}
+			prev = t
+			prevloc = loc
+			prevfile = loc
+			sub(/:[0-9]+$/, "", prevfile)
+			if (prevfile ~ /\/startup-rc\.[^\/]*$/) prevfile = "(profiler)"
+			prevcmd = substr($0, 1, 70)
+		}
+		END {
+			printf "T\t%.1f\t%d\n", total, n
+			for (f in file) printf "F\t%.1f\t%s\n", file[f], f
+			for (c in cmd) printf "C\t%.1f\t%s\n", cmd[c], c
+		}
+	' "$1"
+}
+
+# startup_report TRACE [TOP]: the TOP most expensive files and commands in TRACE
+startup_report() {
+	local top="${2:-15}" costs
+	costs="$(mktemp "${TMPDIR:-/tmp}/startup-costs.XXXXXX")" || return 1
+	startup_costs "$1" > "$costs"
+
+	awk -F '\t' '$1 == "T" { printf "%.1f ms across %d traced commands\n", $2, $3 }' "$costs"
+	printf '\n%9s  %s\n' "self ms" "file"
+	awk -F '\t' '$1 == "F" { printf "%9.1f  %s\n", $2, $3 }' "$costs" | sort -rn | head -n "$top"
+	printf '\n%9s  %s\n' "self ms" "command"
+	awk -F '\t' '$1 == "C" { printf "%9.1f  %s  %s\n", $2, $3, $4 }' "$costs" | sort -rn | head -n "$top"
+	rm -f "$costs"
+}
+
+startup_profile() {
+	local keep="" top=15 trace
+	while [ $# -gt 0 ]; do
+		case "$1" in
+		-o|--output)
+			keep="$2"
+			shift 2 || die "$1 needs a value"
+			;;
+		-n|--top)
+			top="$2"
+			shift 2 || die "$1 needs a value"
+			;;
+		*)
+			warn "usage: bootstrap profile-shell [-o TRACE] [-n TOP]"
+			return 2
+			;;
+		esac
+	done
+	[ -n "$EPOCHREALTIME" ] || die "profile-shell needs bash 5 for EPOCHREALTIME"
+
+	trace="${keep:-$(mktemp "${TMPDIR:-/tmp}/startup-trace.XXXXXX")}"
+	startup_trace "$trace" || die "no trace recorded from ~/.bashrc"
+	startup_report "$trace" "$top"
+	[ -n "$keep" ] || rm -f "$trace"
+}
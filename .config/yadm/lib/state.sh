@@ -0,0 +1,88 @@
+# Per-step fingerprints, so unchanged steps are skipped on the next run.
+#
+# A step names what it depends on in an "# inputs:" header: paths relative
+# to $HOME (files or directories), @head for the yadm HEAD commit,
+# @gitlinks for the recorded submodule SHAs, @checkouts for the commits the
+# submodules actually have checked out, @profile for the host profile,
+# @fonts for the fonts fontconfig knows about and @fontcache for the index
+# of the font cache (see fonts.sh). The fingerprint covers the
+# step file itself plus those inputs, and is stored after a successful run.
+#
+# While a step runs, state/<step>.running marks it as started. A marker that
+# survives into the next run means the step was interrupted: it is re-run
+# regardless of its fingerprint, with BOOTSTRAP_RESUMING set so it can clean
+# up after itself and pick up from the units it already completed.
+
+: "${BOOTSTRAP_CACHE:=${XDG_CACHE_HOME:-$HOME/.cache}/yadm-bootstrap}"
+export BOOTSTRAP_CACHE
+
+state_inputs() {
+	local input
+	local -a paths=()
+	for input in $(step_header "$1" inputs); do
+		case "$input" in
+		@head)
+			printf 'head %s\n' "$(ygit rev-parse -q --verify HEAD)"
+			;;
+		@gitlinks)
+			ygit ls-files -s | awk '$1 == "160000"'
+			;;
+		@profile)
+			printf 'profile %s: %s: %s\n' "$BOOTSTRAP_PROFILE" "$PROFILE_STEPS" "$PROFILE_SUBMODULES"
+			;;
+		@fonts)
+			! command -v fc-list > /dev/null || fc-list --format '%{file} %{fontversion}\n' | LC_ALL=C sort
+			;;
+		@fontcache)
+			[ ! -f "$BOOTSTRAP_FONTS/index" ] || printf 'fontcache %s\n' "$(git hash-object "$BOOTSTRAP_FONTS/index")"
+			;;
+		@checkouts)
+			ygit ls-files -s | while read -r mode _ _ input; do
+				[ "$mode" = 160000 ] && printf 'checkout %s %s\n' "$input" "$(submodule_head "$input")"
+			done
+			;;
+		*)
+			if [ -d "$HOME/$input" ]; then
+				while IFS= read -r input; do
+					paths+=("$input")
+				done < <(cd "$HOME" && find "$input" -type f | LC_ALL=C sort)
+			elif [ -e "$HOME/$input" ]; then
+				paths+=("$input")
+			else
+				printf 'missing %s\n' "$input"
+			fi
+			;;
+		esac
+	done
+	[ "${#paths[@]}" -gt 0 ] || return 0
+	printf '%s\n' "${paths[@]}" | (cd "$HOME" && git hash-object --stdin-paths) | paste -d ' ' - <(printf '%s\n' "${paths[@]}")
+}
+
+state_fingerprint() {
+	{ cat "${STEP_FILE[$1]}"; state_inputs "${STEP_FILE[$1]}"; } | git hash-object --stdin
+}
+
+state_current() {
+	[ -z "$BOOTSTRAP_FORCE" ] || return 1
+	! state_interrupted "$1" || return 1
+	[ -f "$BOOTSTRAP_CACHE/state/$1" ] || return 1
+	[ "$(< "$BOOTSTRAP_CACHE/state/$1")" = "$(state_fingerprint "$1")" ]
+}
+
+state_record() {
+	local file="$BOOTSTRAP_CACHE/state/$1"
+	mkdir -p "${file%/*}"
+	state_fingerprint "$1" > "$file.tmp.$$" && mv -f "$file.tmp.$$" "$file"
+}
+
+state_interrupted() {
+	[ -f "$BOOTSTRAP_CACHE/state/$1.running" ]
+}
+
+state_begin() {
+	mkdir -p "$BOOTSTRAP_CACHE/state" && : > "$BOOTSTRAP_CACHE/state/$1.running"
+}
+
+state_end() {
+	rm -f "$BOOTSTRAP_CACHE/state/$1.running"
+}
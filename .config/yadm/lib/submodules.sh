@@ -0,0 +1,202 @@
+# Submodule checkout for the yadm repo, fetched through a shared object cache.
+#
+# Every submodule URL gets a bare mirror under $BOOTSTRAP_OBJECTS/objects/,
+# refreshed in parallel before the checkout. objects.git borrows from all of
+# them through its alternates file and is handed to `submodule update` as
+# --reference with --dissociate, so clones in this or any other home
+# directory only transfer objects the cache does not have yet, then copy
+# what they took from it into their own object store. The cache only speeds
+# up clones and is safe to delete. Point BOOTSTRAP_OBJECTS (default:
+# BOOTSTRAP_CACHE) at a common directory to share it between home directories.
+#
+# BOOTSTRAP_FETCH_JOBS (default: BOOTSTRAP_JOBS) bounds concurrent fetches.
+# BOOTSTRAP_CLONE selects how submodules are cloned:
+#   full     full history through the object cache (default)
+#   shallow  --depth 1, no cache
+#   partial  --filter=blob:none, blobs fetched on demand, no cache
+
+: "${BOOTSTRAP_CLONE:=full}"
+: "${BOOTSTRAP_OBJECTS:=$BOOTSTRAP_CACHE}"
+
+submodule_cache_dir() {
+	printf '%s/objects/%s.git\n' "$BOOTSTRAP_OBJECTS" "$(printf '%s' "$1" | git hash-object --stdin)"
+}
+
+# submodule_urls [PATH...]: the URLs of the initialized submodules at PATH..., one per line
+submodule_urls() {
+	local key path name
+	local -A want=()
+	for path in "$@"; do
+		want[$path]=1
+	done
+	git config -f "$HOME/.gitmodules" --get-regexp '^submodule\..*\.path$' | while read -r key path; do
+		[ "$#" -eq 0 ] || [ -n "${want[$path]}" ] || continue
+		name="${key#submodule.}"
+		ygit config "submodule.${name%.path}.url"
+	done
+}
+
+# submodule_head PATH: the commit checked out at PATH, if any
+submodule_head() {
+	local gitdir head
+	if [ -f "$HOME/$1/.git" ]; then
+		read -r _ gitdir < "$HOME/$1/.git"
+		case "$gitdir" in
+		/*) ;;
+		*) gitdir="$HOME/$1/$gitdir" ;;
+		esac
+	elif [ -d "$HOME/$1/.git" ]; then
+		gitdir="$HOME/$1/.git"
+	else
+		return 1
+	fi
+	[ -r "$gitdir/HEAD" ] && read -r head < "$gitdir/HEAD" || return 1
+	case "$head" in
+	ref:*) git --git-dir="$gitdir" rev-parse -q --verify HEAD ;;
+	*) printf '%s\n' "$head" ;;
+	esac
+}
+
+# submodule_stale: paths in the host profile whose checked-out commit differs from the recorded gitlink
+submodule_stale() {
+	local mode sha path
+	ygit ls-files -s | while read -r mode sha _ path; do
+		[ "$mode" = 160000 ] && profile_submodule "$path" || continue
+		[ "$(submodule_head "$path")" = "$sha" ] || printf '%s\n' "$path"
+	done
+}
+
+submodule_cache_fetch() {
+	local url=$1 dir
+	dir="$(submodule_cache_dir "$url")"
+	[ -d "$dir" ] || git init -q --bare "$dir" || return 1
+	git --git-dir="$dir" fetch -q --prune --no-tags "$url" \
+		'+refs/heads/*:refs/heads/*' '+refs/tags/*:refs/tags/*'
+}
+
+# submodule_cache_update URL...: refresh the mirrors for URL... in parallel
+submodule_cache_update() {
+	local url dir ref="$BOOTSTRAP_OBJECTS/objects.git"
+	local jobs="${BOOTSTRAP_FETCH_JOBS:-$BOOTSTRAP_JOBS}"
+
+	[ -d "$ref" ] || git init -q --bare "$ref" || return 1
+	for url in "$@"; do
+		while [ "$(jobs -rp | wc -l)" -ge "$jobs" ]; do
+			wait -n
+		done
+		traced "fetch $url" submodule_cache_fetch "$url" || warn "could not cache $url, cloning it directly" &
+	done
+	wait
+
+	for dir in "$BOOTSTRAP_OBJECTS"/objects/*.git; do
+		[ -d "$dir/objects" ] && printf '%s\n' "$dir/objects"
+	done > "$ref/objects/info/alternates"
+}
+
+# submodule_name PATH: the name .gitmodules gives the submodule at PATH
+submodule_name() {
+	local key path
+	git config -f "$HOME/.gitmodules" --get-regexp '^submodule\..*\.path$' | while read -r key path; do
+		[ "$path" = "$1" ] || continue
+		key="${key#submodule.}"
+		printf '%s\n' "${key%.path}"
+		break
+	done
+}
+
+# submodule_gitdir PATH: where the yadm repo keeps the git directory of the submodule at PATH
+submodule_gitdir() {
+	local name
+	name="$(submodule_name "$1")"
+	[ -z "$name" ] || printf '%s/modules/%s\n' "$YADM_REPO" "$name"
+}
+
+# submodule_salvage PATH...: clean up after an interrupted update of the submodules at PATH...
+#
+# Lock files left by a killed git are removed. A git directory that was cut
+# off before it became a usable repository hands its completed packs to the
+# object cache of its URL and is removed, so the next clone starts over
+# without fetching those objects again. Packs still being received
+# (tmp_pack_*) cannot be resumed and are dropped.
+submodule_salvage() {
+	local path gitdir url cache pack
+	for path in "$@"; do
+		gitdir="$(submodule_gitdir "$path")"
+		[ -n "$gitdir" ] && [ -d "$gitdir" ] || continue
+		find "$gitdir" -maxdepth 1 -name '*.lock' -type f -exec rm -f {} +
+		rm -f "$gitdir"/objects/pack/tmp_* "$gitdir"/objects/pack/.tmp-*
+		git --git-dir="$gitdir" rev-parse --git-dir > /dev/null 2>&1 && continue
+
+		log "salvaging objects of the interrupted clone of $path"
+		url="$(submodule_urls "$path")"
+		if [ -n "$url" ] && [ "$BOOTSTRAP_CLONE" = full ]; then
+			cache="$(submodule_cache_dir "$url")"
+			[ -d "$cache" ] || git init -q --bare "$cache"
+			for pack in "$gitdir"/objects/pack/pack-*.idx; do
+				[ -f "$pack" ] && [ -f "${pack%.idx}.pack" ] || continue
+				mv -f "${pack%.idx}.pack" "$pack" "$cache/objects/pack/"
+			done
+		fi
+		rm -rf "$gitdir"
+	done
+}
+
+# submodule_update [PATH...]: check out the recorded commit of each submodule
+submodule_update() {
+	local before rc
+	local -a urls args=(--init --recursive --jobs "${BOOTSTRAP_FETCH_JOBS:-$BOOTSTRAP_JOBS}")
+
+	before="$(telemetry_du "$BOOTSTRAP_OBJECTS/objects" "$YADM_REPO/modules")"
+
+	case "$BOOTSTRAP_CLONE" in
+	full)
+		traced "submodule init" ygit submodule init -- "$@" || return 1
+		mapfile -t urls < <(submodule_urls "$@")
+		submodule_cache_update "${urls[@]}"
+		args+=(--reference "$BOOTSTRAP_OBJECTS/objects.git" --dissociate)
+		;;
+	shallow)
+		args+=(--depth 1)
+		;;
+	partial)
+		args+=(--filter=blob:none)
+		;;
+	*)
+		warn "unknown clone mode '$BOOTSTRAP_CLONE'"
+		return 1
+		;;
+	esac
+
+	traced "submodule update" ygit submodule update "${args[@]}" -- "$@"
+	rc=$?
+	telemetry_bytes $(($(telemetry_du "$BOOTSTRAP_OBJECTS/objects" "$YADM_REPO/modules") - before))
+	return "$rc"
+}
+
+# plan_submodules: the stale submodules and roughly what updating each would fetch
+plan_submodules() {
+	local mode path sha head from name url cache objects
+	ygit ls-files -s | while read -r mode sha _ path; do
+		[ "$mode" = 160000 ] && profile_submodule "$path" || continue
+		head="$(submodule_head "$path")"
+		[ "$head" != "$sha" ] || continue
+		from="${head:0:12}"
+		from="${from:-none}"
+		name="$(submodule_name "$path")"
+		url="$(ygit config "submodule.$name.url" || git config -f "$HOME/.gitmodules" "submodule.$name.url")"
+		cache="$(submodule_cache_dir "$url")"
+		if [ -n "$head" ] && git --git-dir="$(submodule_gitdir "$path")" cat-file -e "$sha^{commit}" 2> /dev/null; then
+			printf '%s: %s -> %s, checkout only\n' "$path" "$from" "${sha:0:12}"
+		elif git --git-dir="$cache" cat-file -e "$sha^{commit}" 2> /dev/null; then
+			objects="$(git --git-dir="$cache" rev-list --objects "$sha" ${head:+--not "$head"} 2> /dev/null | cut -d ' ' -f 1 |
+				git --git-dir="$cache" cat-file --batch-check='%(objectsize:disk)' |
+				awk '{ n++; b += $1 } END { printf "%d objects, %.1f KiB", n, b / 1024 }')"
+			printf '%s: %s -> %s, %s from the object cache\n' "$path" "$from" "${sha:0:12}" "$objects"
+		elif [ -d "$cache" ]; then
+			printf '%s: %s -> %s, needs a fetch (cache holds %d KiB)\n' "$path" "$from" "${sha:0:12}" \
+				"$(($(telemetry_du "$cache") / 1024))"
+		else
+			printf '%s: %s -> %s, needs a full clone of %s\n' "$path" "$from" "${sha:0:12}" "$url"
+		fi
+	done
+}
@@ -0,0 +1,101 @@
+# Per-step timing and the JSON run report.
+#
+# Every step gets its wall time, the CPU time of everything it ran, its exit
+# status and, when the step reports it with telemetry_bytes, the bytes it
+# fetched. The report for each run is written to
+# $BOOTSTRAP_CACHE/history/<UTC time>-<host>-<pid>.json, one step per line,
+# and only the newest BOOTSTRAP_HISTORY (default 200) reports are kept.
+
+: "${BOOTSTRAP_HISTORY:=200}"
+
+now_us() {
+	if [ -n "$EPOCHREALTIME" ]; then
+		local t="${EPOCHREALTIME/[.,]/}"
+		printf '%s\n' "$((10#$t))"
+	else
+		date +%s%6N
+	fi
+}
+
+# telemetry_seconds US: microseconds as decimal seconds
+telemetry_seconds() {
+	printf '%d.%06d' "$(($1 / 1000000))" "$(($1 % 1000000))"
+}
+
+# telemetry_cpu FILE: "user sys" seconds used by the children of the current shell
+telemetry_cpu() {
+	local cu cs
+	times > "$1" || return 1
+	{
+		read -r _ _
+		read -r cu cs
+	} < "$1"
+	rm -f "$1"
+	printf '%s %s\n' "$(telemetry_times_seconds "$cu")" "$(telemetry_times_seconds "$cs")"
+}
+
+# 1m2.345s -> 62.345
+telemetry_times_seconds() {
+	local m="${1%%m*}" s="${1#*m}"
+	s="${s%s}"
+	s="${s/,/.}"
+	awk -v m="$m" -v s="$s" 'BEGIN { printf "%.3f", m * 60 + s }'
+}
+
+# telemetry_bytes N: add N bytes to what the current step fetched
+telemetry_bytes() {
+	[ -n "$SCHED_DIR" ] && [ -n "$BOOTSTRAP_STEP" ] || return 0
+	echo "$1" >> "$SCHED_DIR/$BOOTSTRAP_STEP.bytes"
+}
+
+# telemetry_du PATH...: bytes used on disk under PATH...
+telemetry_du() {
+	local kb=0 k
+	for k in $(du -sk "$@" 2>/dev/null | cut -f1); do
+		kb=$((kb + k))
+	done
+	echo $((kb * 1024))
+}
+
+# telemetry_step NAME STATUS EXIT START_US: record one step of this run
+telemetry_step() {
+	local bytes=0 b cpu
+	if [ -f "$SCHED_DIR/$1.bytes" ]; then
+		while read -r b; do
+			bytes=$((bytes + b))
+		done < "$SCHED_DIR/$1.bytes"
+	fi
+	telemetry_cpu "$SCHED_DIR/$1.times" > "$SCHED_DIR/$1.cpu"
+	cpu="$(< "$SCHED_DIR/$1.cpu")"
+	printf '{"name": "%s", "status": "%s", "exit": %d, "wall_s": %s, "user_s": %s, "sys_s": %s, "bytes": %d}' \
+		"$1" "$2" "$3" "$(telemetry_seconds $(($(now_us) - $4)))" "${cpu% *}" "${cpu#* }" "$bytes" \
+		> "$SCHED_DIR/$1.json"
+}
+
+# telemetry_report START_US EXIT: write the report for this run, print its path
+telemetry_report() {
+	local name dir="$BOOTSTRAP_CACHE/history" file sep=""
+	mkdir -p "$dir" || return 1
+	file="$dir/$(date -u +%Y%m%dT%H%M%SZ)-${HOSTNAME:-$(uname -n)}-$$.json"
+	{
+		printf '{"started": "%s", "host": "%s", "profile": "%s", "jobs": %d, "exit": %d, "wall_s": %s, "steps": [\n' \
+			"$(date -u -d "@$(($1 / 1000000))" +%FT%TZ 2>/dev/null || date -u +%FT%TZ)" \
+			"${HOSTNAME:-$(uname -n)}" "$BOOTSTRAP_PROFILE" "$BOOTSTRAP_JOBS" "$2" "$(telemetry_seconds $(($(now_us) - $1)))"
+		for name in "${STEP_ORDER[@]}"; do
+			printf '%s' "$sep"
+			if [ -f "$SCHED_DIR/$name.json" ]; then
+				cat "$SCHED_DIR/$name.json"
+			else
+				printf '{"name": "%s", "status": "%s", "exit": 0, "wall_s": 0, "user_s": 0, "sys_s": 0, "bytes": 0}' \
+					"$name" "${STEP_STATE[$name]}"
+			fi
+			sep=$',\n'
+		done
+		printf '\n]}\n'
+	} > "$file.tmp.$$" && mv -f "$file.tmp.$$" "$file" || return 1
+
+	ls -1 "$dir"/*.json 2>/dev/null | head -n "-$BOOTSTRAP_HISTORY" | while IFS= read -r name; do
+		rm -f "$name"
+	done
+	printf '%s\n' "$file"
+}
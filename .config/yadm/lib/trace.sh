@@ -0,0 +1,45 @@
+# Chrome trace-event export of a run (--trace FILE or BOOTSTRAP_TRACE).
+#
+# Every step is a span on its own row, and the commands a step wraps in
+# `traced` are spans on the row of the process that ran them, so parallel
+# fetches show side by side. The file opens in chrome://tracing or Perfetto.
+# Timestamps are microseconds since the start of the run.
+
+# trace_event NAME CATEGORY START_US END_US TID [ARGS_JSON]
+trace_event() {
+	[ -n "$BOOTSTRAP_TRACE" ] && [ -n "$SCHED_DIR" ] || return 0
+	printf '{"name": "%s", "cat": "%s", "ph": "X", "pid": 1, "tid": %d, "ts": %d, "dur": %d, "args": %s}\n' \
+		"${1//\"/\\\"}" "$2" "$5" $(($3 - BOOTSTRAP_TRACE_T0)) $(($4 - $3)) "${6:-{\}}" >> "$SCHED_DIR/trace.events"
+}
+
+# traced NAME CMD...: run CMD and record it as a span named NAME
+traced() {
+	local name=$1 start rc
+	shift
+	[ -n "$BOOTSTRAP_TRACE" ] || {
+		"$@"
+		return
+	}
+	start="$(now_us)"
+	"$@"
+	rc=$?
+	trace_event "$name" command "$start" "$(now_us)" "$BASHPID" "{\"exit\": $rc}"
+	return "$rc"
+}
+
+# trace_write: assemble the recorded events into $BOOTSTRAP_TRACE
+trace_write() {
+	local name i=0
+	[ -n "$BOOTSTRAP_TRACE" ] || return 0
+	{
+		printf '{"displayTimeUnit": "ms", "traceEvents": [\n'
+		printf '{"name": "process_name", "ph": "M", "pid": 1, "args": {"name": "bootstrap"}}'
+		for name in "${STEP_ORDER[@]}"; do
+			i=$((i + 1))
+			printf ',\n{"name": "thread_name", "ph": "M", "pid": 1, "tid": %d, "args": {"name": "step %s"}}' "$i" "$name"
+		done
+		[ ! -f "$SCHED_DIR/trace.events" ] || sed 's/^/,/' "$SCHED_DIR/trace.events"
+		printf '\n]}\n'
+	} > "$BOOTSTRAP_TRACE" || return 1
+	log "trace written to $BOOTSTRAP_TRACE"
+}